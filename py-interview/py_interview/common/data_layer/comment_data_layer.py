@@ -4,7 +4,10 @@ from logging import getLogger
 
 from py_interview.common.domain.comment import Comment
 from py_interview.common.helpers.base.base_data_layer import BaseDataLayer
-from py_interview.common.helpers.base.base_data_layer_in_memory import BaseDataLayerInMemory
+from py_interview.common.helpers.base.base_data_layer_in_memory import BaseDataLayerInMemory, Transaction
+from py_interview.common.helpers.base.persistent import PersistentMap, PersistentTable
+
+_BY_EVENT_INDEX = 'comment_uqids_by_event'
 
 class CommentDataLayer(BaseDataLayer, metaclass=abc.ABCMeta):
     """Abstract interface for comment storage operations"""
@@ -19,6 +22,15 @@ class CommentDataLayer(BaseDataLayer, metaclass=abc.ABCMeta):
         :return: The saved comment
         """
 
+    @abc.abstractmethod
+    def add_comments(self, comments: List[Comment]) -> List[Comment]:
+        """
+        Add several comments, possibly to different events, in one write
+
+        :param comments: Comment objects to add, grouped by their event_uqid
+        :return: The saved comments
+        """
+
     @abc.abstractmethod
     def get_comments_for_event(self, event_uqid: str, limit: int = 20, offset: int = 0) -> Tuple[List[Comment], int]:
         """
@@ -36,11 +48,20 @@ class CommentDataLayerInMemory(BaseDataLayerInMemory, CommentDataLayer):
 
     def __init__(self):
         super(CommentDataLayerInMemory, self).__init__(target_class=Comment)
-        # Maps event_uqid -> List[Comment]
-        # WE cannot reuse base class _data dict because we need to group by event
-        self._comment_uqids_by_event = {} # type: dict[str, List[str]]
+        # Maps event_uqid -> PersistentTable of comment_uqid, in insertion order
+        # WE cannot reuse base class _data dict because we need to group by event.
+        # The index lives in the snapshot so it is published atomically with the comments.
         self._logger = getLogger(self.__module__)
 
+    @staticmethod
+    def _index_comments(txn: Transaction, comments: List[Tuple[str, Comment]]) -> None:
+        by_event = txn.get_index(_BY_EVENT_INDEX, PersistentMap())  # type: PersistentMap
+        for event_uqid, comment in comments:
+            txn.put(comment)
+            uqids = by_event.get(event_uqid, PersistentTable())
+            by_event = by_event.set(event_uqid, uqids.set(comment.uqid, None))
+        txn.set_index(_BY_EVENT_INDEX, by_event)
+
     def add_comment(self, event_uqid: str, comment: Comment) -> Comment:
         """
         Add a comment to an event
@@ -49,14 +70,18 @@ class CommentDataLayerInMemory(BaseDataLayerInMemory, CommentDataLayer):
         :param comment: Comment to add
         :return: The saved comment
         """  
-        super().create(obj=comment) 
+        self._write(lambda txn: self._index_comments(txn, [(event_uqid, comment)]))
+        return comment
 
-        if event_uqid not in self._comment_uqids_by_event:
-            self._comment_uqids_by_event[event_uqid] = []
-        
-        self._comment_uqids_by_event[event_uqid].append(comment.uqid)
+    def add_comments(self, comments: List[Comment]) -> List[Comment]:
+        """
+        Add several comments in one write
 
-        return comment
+        :param comments: Comments to add
+        :return: The saved comments
+        """
+        self._write(lambda txn: self._index_comments(txn, [(c.event_uqid, c) for c in comments]))
+        return comments
 
     def get_comments_for_event(self, event_uqid: str, limit: int = 20, offset: int = 0) -> Tuple[List[Comment], int]:
         """
@@ -71,28 +96,34 @@ class CommentDataLayerInMemory(BaseDataLayerInMemory, CommentDataLayer):
         limit = max(1, min(limit, 100))  # Enforce 1-100 range
         offset = max(0, offset)  # Ensure offset is non-negative
 
-        comment_uqids = self._comment_uqids_by_event.get(event_uqid, [])
+        # Read one snapshot so the index and the comments it points at are consistent
+        snapshot = self.snapshot()
+        comment_uqids = snapshot.indexes.get(_BY_EVENT_INDEX, PersistentMap()).get(event_uqid, PersistentTable())
         total_count = len(comment_uqids)
         
         self._logger.info(f"CommentDataLayer: Getting comments for event {event_uqid}, limit={limit}, offset={offset}, total={total_count}")
         
         # Get slice of UQIDs for this page
-        paginated_uqids = comment_uqids[offset:offset+limit]
+        paginated_uqids = comment_uqids.slice_keys(offset, offset + limit)
         
         # Fetch comment objects
-        result_comments = [self._data.get(uqid) for uqid in paginated_uqids if uqid in self._data]
+        result_comments = [snapshot.data.get(uqid) for uqid in paginated_uqids if uqid in snapshot.data]
         
         self._logger.info(f"CommentDataLayer: Returned {len(result_comments)} comments, total available={total_count}")
         
         return result_comments, total_count
 
     def delete(self, uqid: str) -> Optional[Comment]:
-        to_delete = super().get(uqid=uqid)
-        if to_delete is None:
-            return None
-
-        event_uqid = to_delete.event_uqid 
-        if event_uqid in self._comment_uqids_by_event:
-            self._comment_uqids_by_event[event_uqid].remove(uqid)
-        
-        return super().delete(uqid=uqid)
\ No newline at end of file
+        def apply(txn: Transaction) -> Optional[Comment]:
+            to_delete = txn.get(uqid)
+            if to_delete is None:
+                return None
+
+            txn.delete(uqid)
+            by_event = txn.get_index(_BY_EVENT_INDEX, PersistentMap())  # type: PersistentMap
+            event_uqid = to_delete.event_uqid
+            if event_uqid in by_event:
+                txn.set_index(_BY_EVENT_INDEX, by_event.set(event_uqid, by_event[event_uqid].delete(uqid)))
+            return to_delete
+
+        return self._write(apply)
@@ -34,6 +34,18 @@ class EventDataLayer(BaseDataLayer, metaclass=abc.ABCMeta):
 
         """
 
+    @abc.abstractmethod
+    def increment(self, uqid: str, deltas: Dict[str, int], user: str = 'unknown') -> Optional[Event]:
+        """
+
+        """
+
+    @abc.abstractmethod
+    def increment_many(self, deltas: Dict[str, Dict[str, int]], user: str = 'unknown') -> Dict[str, Optional[Event]]:
+        """
+
+        """
+
     @abc.abstractmethod
     def delete(self, uqid: str) -> Optional[Event]:
         """
@@ -45,5 +57,9 @@ class EventDataLayerInMemory(BaseDataLayerInMemory, EventDataLayer):
         super(EventDataLayerInMemory, self).__init__(target_class=Event)
 
 class EventDataLayerCache(BaseDataLayerCache, EventDataLayer, Thread):
-    def __init__(self, underlying: EventDataLayer):
-        BaseDataLayerCache.__init__(self, target_class=Event, underlying=underlying)
+    def __init__(self, underlying: EventDataLayer,
+                 max_get_cache_bytes: int = 32 * 1024 * 1024,
+                 max_list_cache_bytes: int = 32 * 1024 * 1024):
+        BaseDataLayerCache.__init__(self, target_class=Event, underlying=underlying,
+                                    max_get_cache_bytes=max_get_cache_bytes,
+                                    max_list_cache_bytes=max_list_cache_bytes)
@@ -1,4 +1,5 @@
 from dataclasses import dataclass, asdict
+from typing import Optional
 
 from py_interview.common.helpers.base.base import Base, create_base
 
@@ -38,4 +39,11 @@ class EventDTO:
 
 def event_to_dto(event: Event) -> EventDTO: # Do Not return all comments with event
     return EventDTO(name=event.name, description=event.description, img_link=event.img_link,
-                    number_of_likes=event.number_of_likes, uqid=event.uqid)
\ No newline at end of file
+                    number_of_likes=event.number_of_likes, uqid=event.uqid)
+
+@dataclass(slots=True)
+class BatchResultDTO:
+    index: int  # position of the item in the batch request
+    success: bool
+    uqid: Optional[str] = None
+    error: Optional[str] = None
@@ -33,6 +33,27 @@ class BaseDataLayer(abc.ABC):
 
         """
 
+    @abc.abstractmethod
+    def increment(self, uqid: str, deltas: Dict[str, int], user: str = 'unknown') -> Optional[T]:
+        """
+        Atomically adds to numeric attributes, read and write happen under the same lock
+
+        :param uqid: object to update
+        :param deltas: attribute name -> amount to add
+        :param user: user making the change
+        :return: the updated object, None when the uqid does not exist
+        """
+
+    @abc.abstractmethod
+    def increment_many(self, deltas: Dict[str, Dict[str, int]], user: str = 'unknown') -> Dict[str, Optional[T]]:
+        """
+        Atomically applies several increments as one write
+
+        :param deltas: uqid -> attribute name -> amount to add
+        :param user: user making the change
+        :return: uqid -> updated object, None when the uqid does not exist
+        """
+
     @abc.abstractmethod
     def delete(self, uqid: str) -> Optional[T]:
         """
@@ -1,13 +1,19 @@
+import sys
 from logging import getLogger
 from typing import Union, List, Optional, Dict, Any, Type, TypeVar, Tuple
-from cachetools import TTLCache
 from time import sleep
 from threading import Thread, RLock
 from py_interview.common.helpers.base.base_data_layer import BaseDataLayer
 from py_interview.common.helpers.base.base import Base
+from py_interview.common.helpers.base.tiny_lfu_cache import TinyLfuCache, estimate_size
 
 T = TypeVar('T', bound=Base)
 
+_MISSING = object()
+_GET_CACHE_FILL_CHUNK = 1000
+# Rough footprint of one cached row, used to size the get cache's frequency sketch
+_TYPICAL_ROW_BYTES = 512
+
 
 class BaseDataLayerCache(BaseDataLayer, Thread):
 
@@ -16,8 +22,8 @@ class BaseDataLayerCache(BaseDataLayer, Thread):
                  ttl_secs: int = 60 * 10,
                  refresh_cache_secs: int = 60 * 10 - 20,
                  refresh_in_background: bool = True,
-                 max_get_cache_size: int = 5000,
-                 max_list_cache_size=150
+                 max_get_cache_bytes: int = 32 * 1024 * 1024,
+                 max_list_cache_bytes: int = 32 * 1024 * 1024
                  ):
         Thread.__init__(self, daemon=True)
         self._logger = getLogger(self.__module__)
@@ -26,13 +32,18 @@ class BaseDataLayerCache(BaseDataLayer, Thread):
         self._ttl_secs = ttl_secs
         self._refresh_cache_secs = refresh_cache_secs
         self._refresh_in_background = refresh_in_background
-        self._max_get_cache_size = max_get_cache_size
-        self._max_list_cache_size = max_list_cache_size
+        self._max_get_cache_bytes = max_get_cache_bytes
+        self._max_list_cache_bytes = max_list_cache_bytes
 
-        self._get_cache = TTLCache(maxsize=self._max_get_cache_size, ttl=ttl_secs)
-        self._list_cache = TTLCache(maxsize=self._max_list_cache_size, ttl=ttl_secs)
+        # Both caches are bounded by estimated bytes and use TinyLFU admission,
+        # so a large one-off list() cannot evict the hot working set.
+        self._get_cache = TinyLfuCache(maxsize=self._max_get_cache_bytes, ttl=ttl_secs,
+                                       expected_entries=max(1024, self._max_get_cache_bytes // _TYPICAL_ROW_BYTES))
+        self._list_cache = TinyLfuCache(maxsize=self._max_list_cache_bytes, ttl=ttl_secs)
 
         self._lock = RLock()
+        # Bumped on every write so loads that raced with it are not cached
+        self._generation = 0
 
         if self._refresh_cache_secs and self._refresh_in_background:
             self.start()
@@ -40,6 +51,9 @@ class BaseDataLayerCache(BaseDataLayer, Thread):
     def run(self):
         while self._refresh_in_background:
             try:
+                with self._lock:
+                    self._get_cache.expire()
+                    self._list_cache.expire()
                 self.list()
             except Exception as _e:
                 self._logger.exception("Issue loading cache")
@@ -48,45 +62,97 @@ class BaseDataLayerCache(BaseDataLayer, Thread):
     def create(self, obj: Union[T, List[T]]) -> Union[T, List[T]]:
         self._underlying.create(obj=obj)
         objs = [obj] if isinstance(obj, self._target_class) else obj
-        with self._lock:
-            for o in objs:
-                self._get_cache[o.uqid] = o
-            self._list_cache.clear()  # be safe
+        self._invalidate([o.uqid for o in objs])
         return obj
 
     def get(self, uqid: str = None, **kwargs) -> Optional[T]:
         with self._lock:
-            if uqid in self._get_cache:
-                return self._get_cache[uqid]
-            else:
-                underlying = self._underlying.get(uqid=uqid)
-                self._get_cache[uqid] = underlying
-                return underlying
+            cached = self._get_cache.get(uqid, _MISSING)
+            generation = self._generation
+        if cached is not _MISSING:
+            return cached
+
+        # Load and size outside the lock; skip the insert if a write landed meanwhile
+        underlying = self._underlying.get(uqid=uqid)
+        size = estimate_size(underlying)
+        with self._lock:
+            if generation == self._generation:
+                self._get_cache.set(uqid, underlying, size=size)
+        return underlying
 
     def list(self, uqid: str | List[str] = None, offset: int = 0, limit: int = None, **kwargs) -> List[T]:
         limit = limit or 1_000_000
 
+        key = f"{uqid}-{offset}-{limit}-{str(sorted(kwargs.items()))}"
         with self._lock:
-            key = f"{uqid}-{offset}-{limit}-{str(sorted(kwargs.items()))}"
-            if key in self._list_cache:
-                return self._list_cache[key]
-            else:
-                underlying = self._underlying.list(uqid=uqid, offset=offset, limit=limit, **kwargs)
-                self._list_cache[key] = underlying
-                for u in underlying:
-                    self._get_cache[u.uqid] = u
+            cached = self._list_cache.get(key, _MISSING)
+            generation = self._generation
+        if cached is not _MISSING:
+            return cached
+
+        underlying = self._underlying.list(uqid=uqid, offset=offset, limit=limit, **kwargs)
+        size = estimate_size(underlying)
+        # The list size is sampled; charge each row its share instead of measuring them all
+        item_size = (size - sys.getsizeof(underlying)) // max(1, len(underlying))
+        with self._lock:
+            if generation != self._generation:
                 return underlying
+            self._list_cache.set(key, underlying, size=size)
+
+        # Warm the get cache in chunks so other readers are not blocked behind a large result
+        for start in range(0, len(underlying), _GET_CACHE_FILL_CHUNK):
+            with self._lock:
+                if generation != self._generation:
+                    break
+                for u in underlying[start:start + _GET_CACHE_FILL_CHUNK]:
+                    if self._get_cache.peek(u.uqid, _MISSING) is not u:
+                        self._get_cache.set(u.uqid, u, size=item_size)
+        return underlying
 
     def update(self, uqid: str, attr: Dict[str, Any], user: str = 'unknown') -> Optional[T]:
         res = self._underlying.update(uqid=uqid, attr=attr, user=user)
-        with self._lock:
-            self._get_cache[res.uqid] = res
-            self._list_cache.clear()  # be safe
+        self._invalidate([uqid])
+        return res
+
+    def increment(self, uqid: str, deltas: Dict[str, int], user: str = 'unknown') -> Optional[T]:
+        res = self._underlying.increment(uqid=uqid, deltas=deltas, user=user)
+        self._invalidate([uqid])
+        return res
+
+    def increment_many(self, deltas: Dict[str, Dict[str, int]], user: str = 'unknown') -> Dict[str, Optional[T]]:
+        res = self._underlying.increment_many(deltas=deltas, user=user)
+        self._invalidate(list(deltas))
         return res
 
     def delete(self, uqid: str) -> Optional[T]:
         res = self._underlying.delete(uqid=uqid)
+        self._invalidate([uqid])
+        return res
+
+    def _invalidate(self, uqids: List[str]) -> None:
+        # Written rows are dropped rather than stored: concurrent writers can get
+        # here in a different order than they committed, and caching their
+        # results could leave an older row in place of a newer one
         with self._lock:
-            del self._get_cache[res.uqid]
+            self._generation += 1
+            for uqid in uqids:
+                self._get_cache.pop(uqid, None)
             self._list_cache.clear()  # be safe
-        return res
+
+    def memory_usage(self) -> Dict[str, int]:
+        """
+        Reports the estimated bytes held by this layer's caches against its budget.
+
+        :return: Dict of byte counts, entry counts and hit/miss counters per cache
+        """
+        with self._lock:
+            usage = {}
+            for name, cache in (('get_cache', self._get_cache), ('list_cache', self._list_cache)):
+                usage[f'{name}_bytes'] = cache.currsize
+                usage[f'{name}_budget_bytes'] = cache.maxsize
+                usage[f'{name}_entries'] = len(cache)
+                usage[f'{name}_hits'] = cache.hits
+                usage[f'{name}_misses'] = cache.misses
+            usage['total_bytes'] = usage['get_cache_bytes'] + usage['list_cache_bytes']
+            usage['total_budget_bytes'] = usage['get_cache_budget_bytes'] + usage['list_cache_budget_bytes']
+            return usage
@@ -1,39 +1,145 @@
+from collections import deque
 from logging import getLogger
-from dataclasses import asdict
-from typing import Union, List, Optional, Dict, Any, Type, TypeVar
+from dataclasses import asdict, dataclass, field
+from threading import RLock
+from typing import Union, List, Optional, Dict, Any, Type, TypeVar, Callable, Hashable
 
 from py_interview.common.helpers.base.base_data_layer import BaseDataLayer
 from py_interview.common.helpers.base.base import Base
+from py_interview.common.helpers.base.persistent import PersistentMap, PersistentTable
 
 T = TypeVar('T', bound=Base)
 
 
+@dataclass(frozen=True, slots=True)
+class Snapshot:
+    """
+    Immutable, versioned view of an in-memory table.
+
+    Snapshots are never mutated once published, so readers can hold on to one
+    without locking or copying while writers publish newer versions. Versions
+    share every unchanged node of ``data`` and ``indexes``.
+    """
+    version: int = 0
+    data: PersistentTable = field(default_factory=PersistentTable)
+    indexes: PersistentMap = field(default_factory=PersistentMap)
+
+
+class Transaction:
+    """
+    Working state of one group commit. Writes only rebind persistent
+    structures, so rolling back a failed write is restoring two references.
+    """
+
+    def __init__(self, snapshot: Snapshot):
+        self.data = snapshot.data
+        self.indexes = snapshot.indexes
+
+    def get(self, uqid: str) -> Optional[T]:
+        return self.data.get(uqid, None)
+
+    def put(self, obj: T) -> None:
+        self.data = self.data.set(obj.uqid, obj)
+
+    def put_many(self, objs: List[T]) -> None:
+        self.data = self.data.update((o.uqid, o) for o in objs)
+
+    def delete(self, uqid: str) -> None:
+        self.data = self.data.delete(uqid)
+
+    def get_index(self, name: str, default: Any = None) -> Any:
+        return self.indexes.get(name, default)
+
+    def set_index(self, name: str, value: Any) -> None:
+        self.indexes = self.indexes.set(name, value)
+
+
+class _PendingWrite:
+    __slots__ = ('apply', 'done', 'result', 'error')
+
+    def __init__(self, apply: Callable[[Transaction], Any]):
+        self.apply = apply
+        self.done = False
+        self.result = None
+        self.error = None  # type: Optional[BaseException]
+
+
 class BaseDataLayerInMemory(BaseDataLayer):
 
     def __init__(self, target_class: Type[T]):
         self._logger = getLogger(self.__module__)
         self._target_class = target_class
-        self._data = {}  # type: dict[str, T]
+        self._snapshot = Snapshot()
+        self._write_lock = RLock()
+        self._pending = deque()  # type: deque[_PendingWrite]
+
+    def snapshot(self) -> Snapshot:
+        """
+        Returns the current published version of the table. Reading the
+        attribute is atomic, so the returned view is consistent for as long
+        as the caller holds it.
+
+        """
+        return self._snapshot
+
+    def _write(self, apply: Callable[[Transaction], Any]) -> Any:
+        """
+        Group commit: queues ``apply`` and waits for the write lock. Whichever
+        writer holds the lock applies every queued write, in order, to one
+        transaction and publishes them as a single new version, so concurrent
+        writers share one publish.
+
+        :param apply: function of the transaction, run while the lock is held
+        :return: what ``apply`` returned; what it raised is re-raised here
+        """
+        pending = _PendingWrite(apply)
+        self._pending.append(pending)
+        with self._write_lock:
+            if not pending.done:
+                self._commit()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _commit(self) -> None:
+        current = self._snapshot
+        txn = Transaction(current)
+        batch = []
+        while self._pending:
+            pending = self._pending.popleft()
+            batch.append(pending)
+            data, indexes = txn.data, txn.indexes
+            try:
+                pending.result = pending.apply(txn)
+            except Exception as e:
+                txn.data, txn.indexes = data, indexes
+                pending.error = e
+
+        self._snapshot = Snapshot(version=current.version + 1, data=txn.data, indexes=txn.indexes)
+        for pending in batch:
+            pending.done = True
 
     def create(self, obj: Union[T, List[T]]) -> Union[T, List[T]]:
         objs = [obj] if isinstance(obj, self._target_class) else obj
-        res = []
-        for obj in objs:
-            self._data[obj.uqid] = obj
-            res.append(obj)
+        res = list(objs)
+
+        def apply(txn: Transaction):
+            txn.put_many(res)
+
+        self._write(apply)
         return res if len(res) > 1 else res[0]
 
     def get(self, uqid: str = None, **kwargs) -> Optional[T]:
         if uqid is None:
             raise Exception('uqid is none')
         if uqid is not None:
-            return self._data.get(uqid, None)
+            return self._snapshot.data.get(uqid, None)
 
     def list(self, uqid: str | List[str] = None, offset: int = 0, limit: int = None, **kwargs) -> List[T]:
         limit = limit or 1_000_000
 
         res = []
-        values = list(self._data.values())  # type: List[T]
+        values = self._snapshot.data.values()
 
         for v in values:
             if uqid is not None:
@@ -67,15 +173,40 @@ class BaseDataLayerInMemory(BaseDataLayer):
         return res[offset: offset + limit if offset + limit < len(res) else len(res) + 1]
 
     def update(self, uqid: str, attr: Dict[str, Any], user: str = 'unknown') -> Optional[T]:
-        provider = self.get(uqid=uqid)
-        updated_provider = self._target_class(**{**asdict(provider), **attr})
-        self._data[uqid] = updated_provider
-        return updated_provider
+        def apply(txn: Transaction) -> T:
+            provider = txn.get(uqid=uqid)
+            updated_provider = self._target_class(**{**asdict(provider), **attr})
+            txn.put(updated_provider)
+            return updated_provider
+
+        return self._write(apply)
+
+    def increment(self, uqid: str, deltas: Dict[str, int], user: str = 'unknown') -> Optional[T]:
+        def apply(txn: Transaction) -> Optional[T]:
+            return self._increment(txn, uqid, deltas)
+
+        return self._write(apply)
+
+    def increment_many(self, deltas: Dict[str, Dict[str, int]], user: str = 'unknown') -> Dict[str, Optional[T]]:
+        def apply(txn: Transaction) -> Dict[str, Optional[T]]:
+            return {uqid: self._increment(txn, uqid, d) for uqid, d in deltas.items()}
+
+        return self._write(apply)
 
     def delete(self, uqid: str) -> Optional[T]:
-        to_delete = self.get(uqid=uqid)
-        if to_delete is None:
-            return None
+        def apply(txn: Transaction) -> Optional[T]:
+            to_delete = txn.get(uqid=uqid)
+            if to_delete is not None:
+                txn.delete(uqid)
+            return to_delete
+
+        return self._write(apply)
 
-        del self._data[uqid]
-        return to_delete
+    def _increment(self, txn: Transaction, uqid: Hashable, deltas: Dict[str, int]) -> Optional[T]:
+        current = txn.get(uqid)
+        if current is None:
+            return None
+        updated = self._target_class(**{**asdict(current),
+                                        **{k: getattr(current, k) + v for k, v in deltas.items()}})
+        txn.put(updated)
+        return updated
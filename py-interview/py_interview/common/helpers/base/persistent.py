@@ -0,0 +1,383 @@
+from itertools import chain, islice
+from operator import itemgetter
+from typing import Any, Hashable, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+__all__ = ['PersistentMap', 'PersistentVector', 'PersistentTable']
+
+_BITS = 5
+_WIDTH = 1 << _BITS
+_MASK = _WIDTH - 1
+_MISSING = object()
+_KEY = itemgetter(0)
+_VALUE = itemgetter(1)
+
+
+class PersistentVector:
+    """
+    Immutable sequence stored as a 32-way trie of tuples. ``append`` and ``set``
+    return a new vector that shares every node off the modified path, so both
+    cost O(log32 n) instead of copying the sequence. ``extend`` rebuilds the
+    interior nodes once, which is cheaper than appending many values singly.
+    """
+
+    __slots__ = ('_root', '_count', '_shift')
+
+    def __init__(self, root: tuple = (), count: int = 0, shift: int = 0):
+        self._root = root
+        self._count = count
+        self._shift = shift
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i: int) -> Any:
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        node = self._root
+        for level in range(self._shift, 0, -_BITS):
+            node = node[(i >> level) & _MASK]
+        return node[i & _MASK]
+
+    def __iter__(self) -> Iterator[Any]:
+        return chain.from_iterable(self._leaves())
+
+    def _leaves(self) -> List[tuple]:
+        # One list per trie level instead of a generator per node, so iteration
+        # runs at C speed over the leaf tuples
+        nodes = [self._root]
+        for _ in range(self._shift // _BITS):
+            nodes = list(chain.from_iterable(nodes))
+        return nodes
+
+    def slice(self, start: int, stop: int) -> List[Any]:
+        start = max(0, start)
+        stop = min(self._count, stop)
+        return [self[i] for i in range(start, stop)]
+
+    def append(self, value: Any) -> 'PersistentVector':
+        if self._count == 1 << (self._shift + _BITS):
+            root = (self._root, self._new_path(self._shift, value))
+            return PersistentVector(root, self._count + 1, self._shift + _BITS)
+        return PersistentVector(self._append(self._root, self._shift, self._count, value),
+                                self._count + 1, self._shift)
+
+    def set(self, i: int, value: Any) -> 'PersistentVector':
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        return PersistentVector(self._set(self._root, self._shift, i, value), self._count, self._shift)
+
+    def extend(self, values: Iterable[Any]) -> 'PersistentVector':
+        """
+        Appends every value in O(n / 32 + len(values)). Full leaves are shared
+        with this vector; only the last, partial leaf and the interior nodes are
+        rebuilt.
+
+        """
+        values = tuple(values)
+        if not values:
+            return self
+        count = self._count + len(values)
+        leaves = self._leaves() if self._count else []
+        if leaves and len(leaves[-1]) < _WIDTH:
+            values = leaves.pop() + values
+        leaves.extend(values[i:i + _WIDTH] for i in range(0, len(values), _WIDTH))
+
+        level, shift = leaves, 0
+        while len(level) > 1:
+            level = [tuple(level[i:i + _WIDTH]) for i in range(0, len(level), _WIDTH)]
+            shift += _BITS
+        return PersistentVector(level[0], count, shift)
+
+    @classmethod
+    def _new_path(cls, shift: int, value: Any) -> tuple:
+        return (value,) if shift == 0 else (cls._new_path(shift - _BITS, value),)
+
+    @classmethod
+    def _append(cls, node: tuple, shift: int, i: int, value: Any) -> tuple:
+        if shift == 0:
+            return node + (value,)
+        sub = (i >> shift) & _MASK
+        if sub < len(node):
+            return node[:sub] + (cls._append(node[sub], shift - _BITS, i, value),)
+        return node + (cls._new_path(shift - _BITS, value),)
+
+    @classmethod
+    def _set(cls, node: tuple, shift: int, i: int, value: Any) -> tuple:
+        sub = (i >> shift) & _MASK
+        child = value if shift == 0 else cls._set(node[sub], shift - _BITS, i, value)
+        return node[:sub] + (child,) + node[sub + 1:]
+
+
+class PersistentMap(Mapping):
+    """
+    Immutable hash map stored as a 32-way trie keyed on hash bits (a HAMT
+    without bitmap compression). ``set`` and ``delete`` return a new map that
+    shares every node off the modified path. Iteration order is unspecified.
+    """
+
+    __slots__ = ('_root', '_count')
+
+    _LEAF_MAX = 8
+    _MAX_SHIFT = 60
+    _EMPTY_NODE = (None,) * _WIDTH
+
+    def __init__(self, root: tuple = _EMPTY_NODE, count: int = 0):
+        self._root = root
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, key: Hashable) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __iter__(self) -> Iterator[Hashable]:
+        for key, _ in self._items(self._root):
+            yield key
+
+    def items(self) -> Iterator[Tuple[Hashable, Any]]:
+        return self._items(self._root)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        h = hash(key)
+        node = self._root
+        shift = 0
+        while True:
+            child = node[(h >> shift) & _MASK]
+            if child is None:
+                return default
+            if isinstance(child, dict):
+                return child.get(key, default)
+            node = child
+            shift += _BITS
+
+    def set(self, key: Hashable, value: Any) -> 'PersistentMap':
+        root, added = self._set(self._root, 0, hash(key), key, value)
+        return PersistentMap(root, self._count + added)
+
+    def update(self, items: Iterable[Tuple[Hashable, Any]]) -> 'PersistentMap':
+        """
+        Sets many keys at once, copying each touched node only once instead of
+        once per key.
+
+        """
+        items = dict(items)
+        if not items:
+            return self
+        keys = list(items)
+        hashes = list(map(hash, keys))
+        if self._count == 0:
+            root, added = self._build(0, hashes, keys, list(items.values()))
+        else:
+            root, added = self._set_many(self._root, 0, list(zip(hashes, keys, items.values())))
+        return PersistentMap(root, self._count + added)
+
+    def delete(self, key: Hashable) -> 'PersistentMap':
+        if key not in self:
+            return self
+        return PersistentMap(self._delete(self._root, 0, hash(key), key), self._count - 1)
+
+    @classmethod
+    def _items(cls, node: tuple) -> Iterator[Tuple[Hashable, Any]]:
+        for child in node:
+            if child is None:
+                continue
+            if isinstance(child, dict):
+                yield from child.items()
+            else:
+                yield from cls._items(child)
+
+    @classmethod
+    def _set(cls, node: tuple, shift: int, h: int, key: Hashable, value: Any) -> Tuple[tuple, bool]:
+        i = (h >> shift) & _MASK
+        child = node[i]
+        if child is None:
+            new_child, added = {key: value}, True
+        elif isinstance(child, dict):
+            # Leaf dicts are never mutated once they are part of a published node
+            added = key not in child
+            new_child = {**child, key: value}
+            if len(new_child) > cls._LEAF_MAX and shift + _BITS < cls._MAX_SHIFT:
+                sub = cls._EMPTY_NODE
+                for k, v in new_child.items():
+                    sub, _ = cls._set(sub, shift + _BITS, hash(k), k, v)
+                new_child = sub
+        else:
+            new_child, added = cls._set(child, shift + _BITS, h, key, value)
+        return node[:i] + (new_child,) + node[i + 1:], added
+
+    @classmethod
+    def _set_many(cls, node: tuple, shift: int, entries: List[Tuple[int, Hashable, Any]]) -> Tuple[tuple, int]:
+        groups = [[] for _ in range(_WIDTH)]
+        appends = [group.append for group in groups]
+        for entry in entries:
+            appends[(entry[0] >> shift) & _MASK](entry)
+
+        new_node = list(node)
+        added = 0
+        for i, group in enumerate(groups):
+            if not group:
+                continue
+            child = node[i]
+            if child is None and len(group) > cls._LEAF_MAX and shift + _BITS < cls._MAX_SHIFT:
+                new_node[i], child_added = cls._build(shift + _BITS, *zip(*group))
+                added += child_added
+            elif child is None or isinstance(child, dict):
+                leaf = dict(child or ())
+                before = len(leaf)
+                leaf.update((k, v) for _, k, v in group)
+                added += len(leaf) - before
+                if len(leaf) > cls._LEAF_MAX and shift + _BITS < cls._MAX_SHIFT:
+                    leaf, _ = cls._build(shift + _BITS, list(map(hash, leaf)), list(leaf), list(leaf.values()))
+                new_node[i] = leaf
+            else:
+                new_node[i], child_added = cls._set_many(child, shift + _BITS, group)
+                added += child_added
+        return tuple(new_node), added
+
+    @classmethod
+    def _build(cls, shift: int, hashes: List[int], keys: List[Hashable], values: List[Any]) -> Tuple[tuple, int]:
+        # Builds a fresh subtree bottom-up: entries are bucketed once on all the
+        # hash bits of the levels needed for ~LEAF_MAX / 2 keys per leaf, then
+        # each level is made from strided slices of the one below.
+        levels = 1
+        while (len(keys) > (cls._LEAF_MAX // 2) << (_BITS * levels) and levels < 4
+               and shift + _BITS * (levels + 1) < cls._MAX_SHIFT):
+            levels += 1
+        mask = (1 << (_BITS * levels)) - 1
+        slots = [None] * (mask + 1)
+        added = 0
+        for h, k, v in zip(hashes, keys, values):
+            i = (h >> shift) & mask
+            leaf = slots[i]
+            if leaf is None:
+                slots[i] = {k: v}
+                added += 1
+            else:
+                added += k not in leaf
+                leaf[k] = v
+
+        leaf_shift = shift + _BITS * levels
+        if leaf_shift < cls._MAX_SHIFT:
+            for i, leaf in enumerate(slots):
+                if leaf is not None and len(leaf) > cls._LEAF_MAX:
+                    slots[i], _ = cls._build(leaf_shift, list(map(hash, leaf)), list(leaf), list(leaf.values()))
+
+        level = slots
+        for depth in range(levels - 1, -1, -1):
+            stride = 1 << (_BITS * depth)
+            level = [tuple(level[q::stride]) for q in range(stride)]
+            if depth:
+                level = [node if any(node) else None for node in level]
+        return level[0], added
+
+    @classmethod
+    def _delete(cls, node: tuple, shift: int, h: int, key: Hashable) -> tuple:
+        i = (h >> shift) & _MASK
+        child = node[i]
+        if isinstance(child, dict):
+            new_child = {k: v for k, v in child.items() if k != key} or None
+        else:
+            new_child = cls._delete(child, shift + _BITS, h, key)
+        return node[:i] + (new_child,) + node[i + 1:]
+
+
+class PersistentTable(Mapping):
+    """
+    Immutable, insertion-ordered mapping built from a :class:`PersistentMap` of
+    key -> position and a :class:`PersistentVector` of (key, value) rows.
+    Updating a key keeps its position; deleting leaves a hole that is compacted
+    away once holes outnumber live rows, so every write is amortised
+    O(log32 n). ``update`` writes many rows with one bulk pass per structure.
+    """
+
+    __slots__ = ('_positions', '_rows', '_holes')
+
+    def __init__(self, positions: PersistentMap = PersistentMap(), rows: PersistentVector = PersistentVector(),
+                 holes: int = 0):
+        self._positions = positions
+        self._rows = rows
+        self._holes = holes
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __getitem__(self, key: Hashable) -> Any:
+        return self._rows[self._positions[key]][1]
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._positions
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return map(_KEY, self._live_rows())
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        pos = self._positions.get(key)
+        return default if pos is None else self._rows[pos][1]
+
+    def values(self) -> Iterator[Any]:
+        return map(_VALUE, self._live_rows())
+
+    def items(self) -> Iterator[Tuple[Hashable, Any]]:
+        return self._live_rows()
+
+    def _live_rows(self) -> Iterator[Tuple[Hashable, Any]]:
+        rows = iter(self._rows)
+        return rows if self._holes == 0 else filter(None, rows)
+
+    def slice_keys(self, start: int, stop: int) -> List[Hashable]:
+        """
+        Keys of the live rows in positions [start, stop), O(stop - start) while
+        the table has no holes.
+
+        """
+        if self._holes == 0:
+            return [row[0] for row in self._rows.slice(start, stop)]
+        return [key for key, _ in islice(self.items(), max(0, start), max(0, stop))]
+
+    def set(self, key: Hashable, value: Any) -> 'PersistentTable':
+        pos = self._positions.get(key)
+        if pos is not None:
+            return PersistentTable(self._positions, self._rows.set(pos, (key, value)), self._holes)
+        return PersistentTable(self._positions.set(key, len(self._rows)), self._rows.append((key, value)),
+                               self._holes)
+
+    def update(self, items: Iterable[Tuple[Hashable, Any]]) -> 'PersistentTable':
+        """
+        Sets many keys at once; new keys are appended in the order given.
+
+        """
+        if not self._positions:
+            new_rows, rows = dict(items), self._rows
+        else:
+            new_rows, rows = {}, self._rows
+            for key, value in items:
+                pos = self._positions.get(key)
+                if pos is None:
+                    new_rows[key] = value
+                else:
+                    rows = rows.set(pos, (key, value))
+        if not new_rows:
+            return PersistentTable(self._positions, rows, self._holes)
+        positions = self._positions.update(zip(new_rows, range(len(rows), len(rows) + len(new_rows))))
+        return PersistentTable(positions, rows.extend(new_rows.items()), self._holes)
+
+    def delete(self, key: Hashable) -> 'PersistentTable':
+        pos: Optional[int] = self._positions.get(key)
+        if pos is None:
+            return self
+        table = PersistentTable(self._positions.delete(key), self._rows.set(pos, None), self._holes + 1)
+        if table._holes > _WIDTH and table._holes > len(table):
+            return table._compacted()
+        return table
+
+    def _compacted(self) -> 'PersistentTable':
+        return PersistentTable().update(self.items())
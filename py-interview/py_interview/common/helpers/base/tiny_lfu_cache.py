@@ -0,0 +1,321 @@
+import datetime as dt
+import sys
+from collections import OrderedDict
+from dataclasses import fields, is_dataclass
+from itertools import chain, islice
+from time import monotonic
+from typing import Any, Callable, Hashable, Optional
+
+__all__ = ['TinyLfuCache', 'FrequencySketch', 'estimate_size']
+
+_MISSING = object()
+_HALVE = bytes(i >> 1 for i in range(256))
+_SAMPLE_SIZE = 16
+_dataclass_layouts = {}  # type: dict[type, tuple[int, tuple[str, ...]]]
+# Values of these types have the same footprint in every instance; None is
+# left out because an optional field may hold a string on the next instance
+_FIXED_SIZE_TYPES = (int, float, complex, dt.date, dt.time, dt.timedelta)
+
+
+def estimate_size(obj: Any) -> int:
+    """
+    Estimates the memory footprint of a cached value in bytes, in bounded time.
+
+    Containers with more than a handful of elements are sized from an evenly
+    spaced sample of them, so sizing a list of a million rows costs the same as
+    sizing a few. For dataclass instances the fixed-size part (the instance
+    itself and its scalar fields) is measured once per class; fields holding
+    strings, bytes, containers or nested objects are measured on every call.
+
+    :param obj: value to measure
+    :return: estimated size in bytes
+    """
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, int, float, bool)) or obj is None:
+        return size
+    if isinstance(obj, dict):
+        return size + _sampled_size(list(islice(obj.items(), _SAMPLE_SIZE)), len(obj))
+    if isinstance(obj, (list, tuple)):
+        step = max(1, len(obj) // _SAMPLE_SIZE)
+        return size + _sampled_size(obj[::step][:_SAMPLE_SIZE], len(obj))
+    if isinstance(obj, (set, frozenset)):
+        return size + _sampled_size(list(islice(obj, _SAMPLE_SIZE)), len(obj))
+    if is_dataclass(obj):
+        fixed, variable = _dataclass_layout(obj, size)
+        return fixed + sum(estimate_size(getattr(obj, name)) for name in variable)
+    return size
+
+
+def _dataclass_layout(obj: Any, size: int) -> tuple:
+    """
+    Splits a dataclass's fields into a fixed byte count, measured on the first
+    instance seen, and the names of the fields to measure per instance.
+    """
+    cls = type(obj)
+    layout = _dataclass_layouts.get(cls)
+    if layout is None:
+        fixed, variable = size, []
+        for f in fields(obj):
+            value = getattr(obj, f.name)
+            if isinstance(value, _FIXED_SIZE_TYPES):
+                fixed += sys.getsizeof(value)
+            else:
+                variable.append(f.name)
+        layout = _dataclass_layouts[cls] = (fixed, tuple(variable))
+    return layout
+
+
+def _sampled_size(sample: list, count: int) -> int:
+    if not sample:
+        return 0
+    return sum(estimate_size(item) for item in sample) * count // len(sample)
+
+
+class FrequencySketch:
+    """
+    Count-min sketch of 4-bit counters used to estimate how often a key has been
+    requested. Counters are halved every ``sample_size`` increments so the
+    sketch follows a changing working set (TinyLFU "reset").
+    """
+
+    _DEPTH = 4
+    _MAX_COUNT = 15
+
+    def __init__(self, width: int = 1024):
+        self._width = 1 << max(4, (width - 1).bit_length())
+        self._mask = self._width - 1
+        self._table = [bytearray(self._width) for _ in range(self._DEPTH)]
+        self._seeds = (0x9E3779B1, 0x85EBCA77, 0xC2B2AE3D, 0x27D4EB2F)
+        self._sample_size = 10 * self._width
+        self._additions = 0
+
+    def _indexes(self, key: Hashable) -> list:
+        h = hash(key)
+        mask = self._mask
+        return [((h * seed) >> 16) & mask for seed in self._seeds]
+
+    def increment(self, key: Hashable) -> None:
+        added = False
+        for row, i in zip(self._table, self._indexes(key)):
+            if row[i] < self._MAX_COUNT:
+                row[i] += 1
+                added = True
+        if added:
+            self._additions += 1
+            if self._additions >= self._sample_size:
+                self._reset()
+
+    def frequency(self, key: Hashable) -> int:
+        a, b, c, d = self._indexes(key)
+        t = self._table
+        return min(t[0][a], t[1][b], t[2][c], t[3][d])
+
+    def _reset(self) -> None:
+        for row in self._table:
+            row[:] = row.translate(_HALVE)
+        self._additions //= 2
+
+
+class TinyLfuCache:
+    """
+    Byte-bounded cache with W-TinyLFU admission and a per-entry TTL.
+
+    New entries land in a small LRU window. Entries leaving the window only
+    enter the main segmented LRU (probation + protected) if the frequency
+    sketch says they are requested more often than the entry they would evict,
+    so one-off scans cannot flush the hot working set.
+
+    ``maxsize`` and ``currsize`` are expressed in the units of ``getsizeof``,
+    which defaults to :func:`estimate_size` (bytes). Entries larger than the
+    main segment are never cached. ``expected_entries`` sizes the frequency
+    sketch and should be about the number of entries the budget holds, e.g.
+    ``maxsize`` divided by the typical entry size. Not thread-safe; callers
+    lock.
+    """
+
+    def __init__(self, maxsize: int, ttl: float,
+                 getsizeof: Callable[[Any], int] = estimate_size,
+                 window_ratio: float = 0.01,
+                 protected_ratio: float = 0.8,
+                 expected_entries: int = 1024,
+                 timer: Callable[[], float] = monotonic):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._getsizeof = getsizeof
+        self._timer = timer
+
+        self._window_max = max(1, int(maxsize * window_ratio))
+        self._main_max = maxsize - self._window_max
+        self._protected_max = int(self._main_max * protected_ratio)
+
+        # key -> (value, size, expires_at)
+        self._window = OrderedDict()
+        self._probation = OrderedDict()
+        self._protected = OrderedDict()
+        self._window_size = 0
+        self._probation_size = 0
+        self._protected_size = 0
+
+        self._sketch = FrequencySketch(width=expected_entries)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def maxsize(self) -> int:
+        return self._maxsize
+
+    @property
+    def currsize(self) -> int:
+        return self._window_size + self._probation_size + self._protected_size
+
+    def __len__(self) -> int:
+        return len(self._window) + len(self._probation) + len(self._protected)
+
+    def __contains__(self, key: Hashable) -> bool:
+        segment = self._segment_of(key)
+        return segment is not None and segment[key][2] > self._timer()
+
+    def __getitem__(self, key: Hashable) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        self.set(key, value)
+
+    def set(self, key: Hashable, value: Any, size: Optional[int] = None) -> None:
+        """
+        Inserts a value, which is dropped if it is larger than the main segment.
+
+        :param size: precomputed size of ``value``, so callers can measure it
+            before taking their lock; ``getsizeof`` is used when None
+        """
+        size = self._getsizeof(value) if size is None else size
+        self._remove(key)
+        if size > self._main_max:
+            return
+
+        self._window[key] = (value, size, self._timer() + self._ttl)
+        self._window_size += size
+        while self._window_size > self._window_max and self._window:
+            candidate, entry = self._window.popitem(last=False)
+            self._window_size -= entry[1]
+            self._admit(candidate, entry)
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Looks a key up without recording the access or changing its recency.
+
+        """
+        segment = self._segment_of(key)
+        if segment is None or segment[key][2] <= self._timer():
+            return default
+        return segment[key][0]
+
+    def __delitem__(self, key: Hashable) -> None:
+        if self._remove(key) is _MISSING:
+            raise KeyError(key)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Looks a key up and records the access in the frequency sketch, whether
+        it hits or not.
+
+        """
+        self._sketch.increment(key)
+        segment = self._segment_of(key)
+        if segment is None:
+            self.misses += 1
+            return default
+
+        value, size, expires_at = segment[key]
+        if expires_at <= self._timer():
+            self._remove(key)
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        if segment is self._probation:
+            del self._probation[key]
+            self._probation_size -= size
+            self._protected[key] = (value, size, expires_at)
+            self._protected_size += size
+            while self._protected_size > self._protected_max and self._protected:
+                demoted, entry = self._protected.popitem(last=False)
+                self._protected_size -= entry[1]
+                self._probation[demoted] = entry
+                self._probation_size += entry[1]
+        else:
+            segment.move_to_end(key)
+        return value
+
+    def pop(self, key: Hashable, default: Any = _MISSING) -> Any:
+        value = self._remove(key)
+        if value is _MISSING:
+            if default is _MISSING:
+                raise KeyError(key)
+            return default
+        return value
+
+    def clear(self) -> None:
+        """
+        Drops every entry. The frequency history is kept so the next admissions
+        still favour the hot keys.
+
+        """
+        self._window.clear()
+        self._probation.clear()
+        self._protected.clear()
+        self._window_size = self._probation_size = self._protected_size = 0
+
+    def expire(self) -> None:
+        """
+        Removes every entry whose TTL has elapsed.
+
+        """
+        now = self._timer()
+        for segment in (self._window, self._probation, self._protected):
+            for key in [k for k, entry in segment.items() if entry[2] <= now]:
+                self._remove(key)
+
+    def _segment_of(self, key: Hashable) -> Optional[OrderedDict]:
+        for segment in (self._window, self._probation, self._protected):
+            if key in segment:
+                return segment
+        return None
+
+    def _remove(self, key: Hashable) -> Any:
+        if key in self._window:
+            value, size, _ = self._window.pop(key)
+            self._window_size -= size
+        elif key in self._probation:
+            value, size, _ = self._probation.pop(key)
+            self._probation_size -= size
+        elif key in self._protected:
+            value, size, _ = self._protected.pop(key)
+            self._protected_size -= size
+        else:
+            return _MISSING
+        return value
+
+    def _admit(self, candidate: Hashable, entry: tuple) -> None:
+        # Pick every victim the candidate would displace before evicting any, so
+        # a rejected candidate leaves the main segments untouched
+        size = entry[1]
+        excess = self._probation_size + self._protected_size + size - self._main_max
+        victims = []
+        if excess > 0:
+            candidate_freq = self._sketch.frequency(candidate)
+            for victim, victim_entry in chain(self._probation.items(), self._protected.items()):
+                if candidate_freq <= self._sketch.frequency(victim):
+                    return
+                victims.append(victim)
+                excess -= victim_entry[1]
+                if excess <= 0:
+                    break
+        for victim in victims:
+            self._remove(victim)
+
+        self._probation[candidate] = entry
+        self._probation_size += size
@@ -1,11 +1,16 @@
+import math
 import os
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import Dict, Iterable, Optional, Tuple
 
 from falcon import API, Request, Response
-from falcon.errors import HTTPInternalServerError
+from falcon.errors import HTTPInternalServerError, HTTPPayloadTooLarge, HTTPServiceUnavailable, HTTPTooManyRequests
 from logging import getLogger
 import sentry_sdk
 
-__all__ = ['BaseAPI']
+__all__ = ['BaseAPI', 'AdmissionControlMiddleware', 'charge_admission']
 
 
 class LogMiddleware:
@@ -40,9 +45,213 @@ class LogMiddlewareAsync:
         self._logger.info(f"Responding to {req.access_route} {req.method}:{req.path} | {resp.status}")
 
 
+class TokenBucket:
+    """
+    Classic token bucket: refills at ``rate`` tokens per second up to ``burst``.
+    Not thread-safe; callers lock.
+    """
+
+    def __init__(self, rate: float, burst: int, now: float):
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._updated_at = now
+
+    @property
+    def burst(self) -> int:
+        return self._burst
+
+    def wait_time(self, now: float, cost: int = 1) -> float:
+        """
+        Refills the bucket and checks whether ``cost`` tokens are available, without taking them.
+
+        :param now: current monotonic time
+        :param cost: tokens needed, at most ``burst``
+        :return: 0 when available, otherwise seconds until they are
+        """
+        self._tokens = min(self._burst, self._tokens + (now - self._updated_at) * self._rate)
+        self._updated_at = now
+        if self._tokens >= cost:
+            return 0.0
+        return (cost - self._tokens) / self._rate
+
+    def take(self, cost: int = 1) -> None:
+        self._tokens -= cost
+
+
+class AdmissionControlMiddleware:
+    """
+    Sheds load before it reaches a resource.
+
+    Writes (anything but GET/HEAD/OPTIONS) must get a token from both a
+    per-client and, when configured, a per-route bucket, or are rejected with
+    429. Resources that accept batches charge extra tokens per item with
+    :func:`charge_admission`. In-flight requests are capped at
+    ``max_in_flight``; writes may only use ``max_in_flight_writes`` of those
+    slots, so reads keep the remaining capacity when the server is saturated.
+    Over-budget requests get 503. Both responses carry Retry-After.
+
+    In-flight limits only apply if the WSGI server runs requests concurrently
+    (a threaded server such as ``gunicorn --worker-class gthread``); on a
+    single-threaded server requests queue in the socket backlog instead.
+    """
+
+    READ_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])
+
+    def __init__(self, max_in_flight: int = 64,
+                 max_in_flight_writes: int = 16,
+                 client_rate: float = 20.0,
+                 client_burst: int = 100,
+                 route_limits: Optional[Dict[str, Tuple[float, int]]] = None,
+                 max_clients: int = 10_000,
+                 retry_after_secs: int = 1,
+                 trusted_proxies: Iterable[str] = ()):
+        """
+        :param max_in_flight: requests processed concurrently before anything is shed
+        :param max_in_flight_writes: concurrent writes before writes are shed
+        :param client_rate: writes per second allowed per client
+        :param client_burst: write burst allowed per client, also the largest batch a client can send
+        :param route_limits: route path -> (writes per second, burst) shared by all clients
+        :param max_clients: per-client buckets kept before the least recently seen are dropped
+        :param retry_after_secs: Retry-After sent with 503
+        :param trusted_proxies: proxy addresses whose forwarding headers identify the client.
+            Without one, clients are keyed on the socket address since the headers are client-controlled.
+        """
+        self._logger = getLogger(self.__module__)
+        self._max_in_flight = max_in_flight
+        self._max_in_flight_writes = max_in_flight_writes
+        self._client_rate = client_rate
+        self._client_burst = client_burst
+        self._route_limits = route_limits or {}
+        self._max_clients = max_clients
+        self._retry_after_secs = retry_after_secs
+        self._trusted_proxies = frozenset(trusted_proxies)
+
+        self._lock = Lock()
+        self._in_flight = 0
+        self._in_flight_writes = 0
+        self._client_buckets = OrderedDict()  # type: OrderedDict[str, TokenBucket]
+        self._route_buckets = {}  # type: dict[str, TokenBucket]
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def in_flight_writes(self) -> int:
+        return self._in_flight_writes
+
+    def process_request(self, req: Request, *_args, **_kwargs):
+        is_write = req.method not in self.READ_METHODS
+
+        with self._lock:
+            # Shed before taking tokens: a request turned away for load keeps the
+            # client's allowance for its retry
+            if self._in_flight >= self._max_in_flight or \
+                    (is_write and self._in_flight_writes >= self._max_in_flight_writes):
+                self._logger.warning(
+                    f"Shedding {self._client_key(req)} {req.method}:{req.path}, in_flight={self._in_flight}")
+                raise HTTPServiceUnavailable(retry_after=self._retry_after_secs)
+
+            if is_write:
+                self._take_tokens(req, 1)
+
+            self._in_flight += 1
+            if is_write:
+                self._in_flight_writes += 1
+
+        req.context.admission = self
+        req.context.admission_cost = 1 if is_write else 0
+        req.context.admitted_write = is_write
+
+    def process_response(self, req: Request, resp: Response, *_args, **_kwargs):
+        # process_response runs even for requests shed in process_request
+        admitted_write = getattr(req.context, 'admitted_write', None)
+        if admitted_write is None:
+            return
+        with self._lock:
+            self._in_flight -= 1
+            if admitted_write:
+                self._in_flight_writes -= 1
+
+    def charge(self, req: Request, cost: int) -> None:
+        """
+        Raises the token cost of an admitted request to ``cost``, e.g. one per batch item.
+
+        :raises HTTPTooManyRequests: when the client or route cannot afford the extra tokens
+        :raises HTTPPayloadTooLarge: when ``cost`` exceeds a bucket's burst and can never be afforded
+        """
+        extra = cost - req.context.admission_cost
+        if extra <= 0:
+            return
+        with self._lock:
+            self._take_tokens(req, extra, total_cost=cost)
+        req.context.admission_cost = cost
+
+    def _take_tokens(self, req: Request, cost: int, total_cost: Optional[int] = None) -> None:
+        # Check every bucket before taking from any, so a request rejected by
+        # one limit does not spend the allowance of another
+        now = monotonic()
+        client = self._client_key(req)
+        buckets = [self._client_bucket(client, now)]
+        if req.path in self._route_limits:
+            buckets.append(self._route_bucket(req.path, now))
+
+        total_cost = total_cost or cost
+        burst = min(bucket.burst for bucket in buckets)
+        if total_cost > burst:
+            raise HTTPPayloadTooLarge(description=f"Request costs {total_cost} writes, more than the burst of {burst}")
+
+        wait = max(bucket.wait_time(now, cost) for bucket in buckets)
+        if wait:
+            self._logger.warning(f"Rate limited {client} {req.method}:{req.path}")
+            raise HTTPTooManyRequests(retry_after=math.ceil(wait))
+
+        for bucket in buckets:
+            bucket.take(cost)
+
+    def _client_key(self, req: Request) -> str:
+        if req.remote_addr not in self._trusted_proxies:
+            return req.remote_addr
+        # access_route lists the original client first and the closest proxy last
+        for addr in reversed(req.access_route):
+            if addr not in self._trusted_proxies:
+                return addr
+        return req.remote_addr
+
+    def _client_bucket(self, client: str, now: float) -> TokenBucket:
+        bucket = self._client_buckets.get(client)
+        if bucket is None:
+            bucket = TokenBucket(rate=self._client_rate, burst=self._client_burst, now=now)
+            self._client_buckets[client] = bucket
+            if len(self._client_buckets) > self._max_clients:
+                self._client_buckets.popitem(last=False)
+        else:
+            self._client_buckets.move_to_end(client)
+        return bucket
+
+    def _route_bucket(self, path: str, now: float) -> TokenBucket:
+        bucket = self._route_buckets.get(path)
+        if bucket is None:
+            rate, burst = self._route_limits[path]
+            bucket = TokenBucket(rate=rate, burst=burst, now=now)
+            self._route_buckets[path] = bucket
+        return bucket
+
+
+def charge_admission(req: Request, cost: int) -> None:
+    """
+    Charges an admitted write ``cost`` tokens in total; a no-op without admission control.
+
+    """
+    admission = getattr(req.context, 'admission', None)
+    if admission is not None:
+        admission.charge(req, cost)
+
+
 class BaseAPI(API):
-    def __init__(self):
-        middleware = [LogMiddleware()]
+    def __init__(self, admission_control: Optional[AdmissionControlMiddleware] = None):
+        middleware = [LogMiddleware(), admission_control or AdmissionControlMiddleware()]
 
         if os.getenv('ENV', 'dev') == 'prd':
             sentry_sdk.init(
@@ -1,12 +1,30 @@
 import abc
-from typing import List, Optional, Tuple
+from typing import List, Optional, Tuple, Dict, Any
 from logging import getLogger
 
 from py_interview.common.data_layer.event_data_layer import EventDataLayer
 from py_interview.common.data_layer.comment_data_layer import CommentDataLayer
-from py_interview.common.domain.event import EventDTO, event_to_dto, new_event
+from py_interview.common.domain.event import EventDTO, BatchResultDTO, event_to_dto, new_event
 from py_interview.common.domain.comment import CommentDTO, comment_to_dto, new_comment
 
+# A mobile client buffers at most this many likes per event, and per upload
+MAX_LIKES_PER_ITEM = 10
+MAX_LIKES_PER_BATCH = 100
+
+
+def like_count(like: Dict[str, Any]) -> Optional[int]:
+    """
+    The number of likes a batch item asks for, or None if its count is not an
+    integer from 1 to MAX_LIKES_PER_ITEM
+
+    :param like: batch item of {'uqid': event id, 'count': number of likes, default 1}
+    :return: Optional[int]
+    """
+    count = like.get('count', 1)
+    if not isinstance(count, int) or isinstance(count, bool) or not 1 <= count <= MAX_LIKES_PER_ITEM:
+        return None
+    return count
+
 class EventService(metaclass=abc.ABCMeta):
     def get_events(self) -> List[EventDTO]:
         """
@@ -27,12 +45,21 @@ class EventService(metaclass=abc.ABCMeta):
         :return: EventDTO
         """
 
-    def like_event(self, uqid: str) -> None:
+    def like_event(self, uqid: str) -> bool:
         """
         likes an event
 
         :param uqid:
-        :return: None
+        :return: False if there is no event with that uqid
+        """
+
+    def like_events(self, likes: List[Dict[str, Any]]) -> List[BatchResultDTO]:
+        """
+        likes several events in one write, duplicates are coalesced
+
+        :param likes: items of {'uqid': event id, 'count': number of likes, default 1, at most
+            MAX_LIKES_PER_ITEM}; items past MAX_LIKES_PER_BATCH likes in total are rejected
+        :return: one result per item, in request order
         """
 
     def get_comments(self, event_uqid: str, limit: int = 20, offset: int = 0) -> Tuple[List[CommentDTO], int]:
@@ -55,6 +82,14 @@ class EventService(metaclass=abc.ABCMeta):
         :return: The saved comment
         """
 
+    def add_comments(self, comments: List[Dict[str, Any]]) -> List[BatchResultDTO]:
+        """
+        adds several comments in one write
+
+        :param comments: items of {'uqid': event id, 'user': user, 'text': text}
+        :return: one result per item, in request order, uqid is the new comment id
+        """
+
 class EventServiceDefault(EventService):
 
     def __init__(self, event_data_layer: EventDataLayer, comment_data_layer: CommentDataLayer):
@@ -79,12 +114,42 @@ class EventServiceDefault(EventService):
 
         return event_to_dto(event)
 
-    def like_event(self, uqid: str) -> None:
-        event = self._event_data_layer.get(uqid=uqid)
-
-        self._event_data_layer.update(
-            uqid=uqid, attr={'number_of_likes': event.number_of_likes + 1}
-        )
+    def like_event(self, uqid: str) -> bool:
+        return self._event_data_layer.increment(uqid=uqid, deltas={'number_of_likes': 1}) is not None
+
+    def like_events(self, likes: List[Dict[str, Any]]) -> List[BatchResultDTO]:
+        results = [None] * len(likes)  # type: List[Optional[BatchResultDTO]]
+        counts = {}  # type: Dict[str, int]
+        indexes_by_uqid = {}  # type: Dict[str, List[int]]
+        batch_total = 0
+
+        for i, like in enumerate(likes):
+            uqid = like.get('uqid', None)
+            count = like_count(like)
+            if not isinstance(uqid, str) or not uqid:
+                results[i] = BatchResultDTO(index=i, success=False, error='uqid must be a non-empty string')
+            elif count is None:
+                results[i] = BatchResultDTO(index=i, success=False, uqid=uqid,
+                                            error=f'count must be an integer from 1 to {MAX_LIKES_PER_ITEM}')
+            elif batch_total + count > MAX_LIKES_PER_BATCH:
+                results[i] = BatchResultDTO(index=i, success=False, uqid=uqid,
+                                            error=f'batch exceeds {MAX_LIKES_PER_BATCH} likes')
+            else:
+                batch_total += count
+                counts[uqid] = counts.get(uqid, 0) + count
+                indexes_by_uqid.setdefault(uqid, []).append(i)
+
+        deltas = {uqid: {'number_of_likes': count} for uqid, count in counts.items()}
+        updated = self._event_data_layer.increment_many(deltas=deltas) if deltas else {}
+        for uqid, indexes in indexes_by_uqid.items():
+            success = updated.get(uqid, None) is not None
+            for i in indexes:
+                results[i] = BatchResultDTO(index=i, success=success, uqid=uqid,
+                                            error=None if success else 'event not found')
+
+        liked = sum(1 for event in updated.values() if event is not None)
+        self._logger.info(f"Service: Liked {liked} events from a batch of {len(likes)}")
+        return results
 
     def get_comments(self, event_uqid: str, limit: int = 20, offset: int = 0) -> Tuple[List[CommentDTO], int]:
         """Get comments with offset pagination"""
@@ -100,10 +165,34 @@ class EventServiceDefault(EventService):
         saved_comment = self._comment_data_layer.add_comment(event_uqid, comment)
         self._logger.info(f"Service: Comment saved successfully, saved_comment uqid={saved_comment.uqid}")
         return comment_to_dto(saved_comment) 
-    
-    def like_comment(self, comment_uqid: str) -> None:
-        comment = self._comment_data_layer.get(uqid=comment_uqid)
 
-        self._comment_data_layer.update(
-            uqid=comment_uqid, attr={'number_of_likes': comment.number_of_likes + 1}
-        )
\ No newline at end of file
+    def add_comments(self, comments: List[Dict[str, Any]]) -> List[BatchResultDTO]:
+        results = []  # type: List[BatchResultDTO]
+        to_save = []
+        known_events = {}  # type: Dict[str, bool]
+
+        for i, item in enumerate(comments):
+            event_uqid = item.get('uqid', None)
+            user = item.get('user', None)
+            text = item.get('text', None)
+            if not all(isinstance(v, str) and v for v in (event_uqid, user, text)):
+                results.append(BatchResultDTO(index=i, success=False,
+                                              error='uqid, user and text must be non-empty strings'))
+                continue
+            if event_uqid not in known_events:
+                known_events[event_uqid] = self._event_data_layer.get(uqid=event_uqid) is not None
+            if not known_events[event_uqid]:
+                results.append(BatchResultDTO(index=i, success=False, error='event not found'))
+                continue
+
+            comment = new_comment(event_uqid=event_uqid, user=user, text=text)
+            to_save.append(comment)
+            results.append(BatchResultDTO(index=i, success=True, uqid=comment.uqid))
+
+        if to_save:
+            self._comment_data_layer.add_comments(to_save)
+        self._logger.info(f"Service: Saved {len(to_save)} comments from a batch of {len(comments)}")
+        return results
+    
+    def like_comment(self, comment_uqid: str) -> bool:
+        return self._comment_data_layer.increment(uqid=comment_uqid, deltas={'number_of_likes': 1}) is not None
\ No newline at end of file
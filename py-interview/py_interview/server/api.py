@@ -1,4 +1,4 @@
-from py_interview.common.helpers.base_api import BaseAPI
+from py_interview.common.helpers.base_api import BaseAPI, AdmissionControlMiddleware
 from py_interview.common.service.event_service import EventService
 
 from py_interview.server.resources.event_resource import EventResource
@@ -7,7 +7,12 @@ from py_interview.server.resources.event_resource import EventResource
 class Api(BaseAPI):
 
     def __init__(self, event_service: EventService):
-        BaseAPI.__init__(self)
+        BaseAPI.__init__(self, admission_control=AdmissionControlMiddleware(
+            route_limits={
+                '/api/event/like': (200.0, 400),
+                '/api/event/comment': (50.0, 100),
+                '/api/event/comment/like': (200.0, 400),
+            }))
 
         event_resource = EventResource(event_service=event_service)
         self.add_route('/api/event', event_resource)
@@ -1,5 +1,6 @@
 import logging
-from wsgiref.simple_server import make_server
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import make_server, WSGIServer
 
 from py_interview.common.data_layer.comment_data_layer import CommentDataLayerInMemory
 from py_interview.common.data_layer.event_data_layer import EventDataLayerCache, EventDataLayerInMemory
@@ -37,7 +38,19 @@ event_service = EventServiceDefault(event_data_layer=event_data_layer, comment_d
 
 app = Api(event_service=event_service)
 
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    """
+    Runs each request on its own thread. AdmissionControlMiddleware can only
+    shed load and keep capacity for reads if requests reach the app
+    concurrently; a single-threaded server would leave them queued in the
+    socket backlog. In production run e.g.
+    ``gunicorn --worker-class gthread --threads 32 py_interview.server.app:app``.
+    """
+    daemon_threads = True
+
+
 if __name__ == '__main__':
-    with make_server('', 8000, app) as httpd:
+    with make_server('', 8000, app, server_class=ThreadingWSGIServer) as httpd:
         print('Serving on port 8000...')
         httpd.serve_forever()
\ No newline at end of file
@@ -4,7 +4,25 @@ from logging import getLogger
 
 import falcon
 
-from py_interview.common.service.event_service import EventService
+from py_interview.common.helpers.base_api import charge_admission
+from py_interview.common.service.event_service import EventService, MAX_LIKES_PER_BATCH, like_count
+
+# Fits within the default per-client write burst, since every item costs a token
+MAX_BATCH_SIZE = 100
+
+
+def _batch_items(items, name: str) -> list:
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        raise falcon.HTTPBadRequest(description=f'{name} must be a list of objects')
+    if len(items) > MAX_BATCH_SIZE:
+        raise falcon.HTTPBadRequest(description=f'{name} accepts at most {MAX_BATCH_SIZE} items')
+    return items
+
+
+def _like_cost(likes: list) -> int:
+    # One token per like actually requested, as if each were its own request
+    cost = sum(like_count(like) or 1 for like in likes)
+    return min(cost, MAX_LIKES_PER_BATCH)
 
 
 class EventResource:
@@ -34,9 +52,20 @@ class EventResource:
 
     def on_post_like(self, req, resp):
         post_body = json.load(req.bounded_stream)
+        if 'likes' in post_body:
+            # Batch: {"likes": [{"uqid": ..., "count": ...}, ...]}
+            likes = _batch_items(post_body['likes'], 'likes')
+            charge_admission(req, _like_cost(likes))
+            results = self._event_service.like_events(likes=likes)
+            resp.media = {'success': all(r.success for r in results),
+                          'results': [dc.asdict(r) for r in results]}
+            resp.status = falcon.HTTP_200
+            return
+
         uqid = post_body.get('uqid', None)
 
-        self._event_service.like_event(uqid=uqid)
+        if not self._event_service.like_event(uqid=uqid):
+            raise falcon.HTTPNotFound(description='event not found')
         resp.media = {'success': True}
 
         resp.status = falcon.HTTP_200  # This is the default status
@@ -44,6 +73,17 @@ class EventResource:
     def on_post_comment(self, req, resp):
         self._logger.info("Resource: POST /api/event/comment - Add comment request received")
         post_body = json.load(req.bounded_stream)
+        if isinstance(post_body, list):
+            # Batch: [{"uqid": ..., "user": ..., "text": ...}, ...]
+            comments = _batch_items(post_body, 'comments')
+            charge_admission(req, len(comments))
+            results = self._event_service.add_comments(comments=comments)
+            self._logger.info(f"Resource: Batch of {len(results)} comments processed")
+            resp.media = {'success': all(r.success for r in results),
+                          'results': [dc.asdict(r) for r in results]}
+            resp.status = falcon.HTTP_200
+            return
+
         event_uqid = post_body.get('uqid', None) # id of event
         user = post_body.get('user', None)
         text = post_body.get('text', None)
@@ -81,7 +121,8 @@ class EventResource:
         post_body = json.load(req.bounded_stream)
         comment_uqid = post_body.get('comment_uqid', None)
 
-        self._event_service.like_comment(comment_uqid=comment_uqid)
+        if not self._event_service.like_comment(comment_uqid=comment_uqid):
+            raise falcon.HTTPNotFound(description='comment not found')
 
         resp.media = {'success': True}
 
@@ -0,0 +1,128 @@
+import pytest
+
+falcon = pytest.importorskip('falcon')
+pytest.importorskip('sentry_sdk')
+
+from falcon import testing  # noqa: E402
+
+from py_interview.common.helpers.base_api import AdmissionControlMiddleware, BaseAPI, charge_admission  # noqa: E402
+
+
+class EchoResource:
+
+    def on_get(self, req, resp):
+        resp.media = {'ok': True}
+
+    def on_post(self, req, resp):
+        charge_admission(req, int(req.get_param('cost', default=1)))
+        resp.media = {'ok': True}
+
+
+class BoomResource:
+
+    def on_post(self, req, resp):
+        raise RuntimeError('boom')
+
+
+class NestedResource:
+    """Issues requests while its own write is in flight."""
+
+    def __init__(self):
+        self.client = None
+        self.inner = {}
+
+    def on_post(self, req, resp):
+        self.inner['post'] = self.client.simulate_post('/echo')
+        self.inner['get'] = self.client.simulate_get('/echo')
+        resp.media = {'ok': True}
+
+
+def _client(**kwargs):
+    admission = AdmissionControlMiddleware(**kwargs)
+    app = BaseAPI(admission_control=admission)
+    nested = NestedResource()
+    app.add_route('/echo', EchoResource())
+    app.add_route('/other', EchoResource())
+    app.add_route('/boom', BoomResource())
+    app.add_route('/nested', nested)
+    client = testing.TestClient(app)
+    nested.client = client
+    return client, admission, nested
+
+
+def test_client_rate_limit_returns_429_with_retry_after():
+    client, _, _ = _client(client_rate=1, client_burst=2)
+
+    assert client.simulate_post('/echo').status_code == 200
+    assert client.simulate_post('/echo').status_code == 200
+    result = client.simulate_post('/echo')
+
+    assert result.status_code == 429
+    assert result.headers['Retry-After'] == '1'
+
+
+def test_reads_are_not_rate_limited():
+    client, _, _ = _client(client_rate=0.001, client_burst=1)
+
+    assert all(client.simulate_get('/echo').status_code == 200 for _ in range(5))
+
+
+def test_route_limit_does_not_spend_client_tokens():
+    client, _, _ = _client(client_rate=0.001, client_burst=2, route_limits={'/echo': (0.001, 1)})
+
+    assert client.simulate_post('/echo').status_code == 200
+    assert client.simulate_post('/echo').status_code == 429  # route bucket empty
+    assert client.simulate_post('/other').status_code == 200  # client token still there
+    assert client.simulate_post('/other').status_code == 429
+
+
+def test_writes_shed_with_503_while_reads_keep_capacity():
+    client, _, nested = _client(max_in_flight=2, max_in_flight_writes=1)
+
+    assert client.simulate_post('/nested').status_code == 200
+
+    assert nested.inner['post'].status_code == 503
+    assert nested.inner['post'].headers['Retry-After'] == '1'
+    assert nested.inner['get'].status_code == 200
+
+
+def test_shed_write_keeps_its_tokens():
+    client, _, nested = _client(max_in_flight_writes=1, client_rate=0.001, client_burst=2)
+
+    assert client.simulate_post('/nested').status_code == 200  # spends one token
+
+    assert nested.inner['post'].status_code == 503
+    assert client.simulate_post('/echo').status_code == 200  # the shed retry is still affordable
+
+
+def test_in_flight_released_on_errors_and_rejections():
+    client, admission, _ = _client(client_rate=0.001, client_burst=1)
+
+    assert client.simulate_post('/boom').status_code == 500
+    assert client.simulate_post('/boom').status_code == 429
+
+    assert admission.in_flight == 0
+    assert admission.in_flight_writes == 0
+
+
+def test_forwarded_for_is_ignored_without_trusted_proxy():
+    client, _, _ = _client(client_rate=0.001, client_burst=1)
+
+    assert client.simulate_post('/echo', headers={'X-Forwarded-For': '10.0.0.1'}).status_code == 200
+    assert client.simulate_post('/echo', headers={'X-Forwarded-For': '10.0.0.2'}).status_code == 429
+
+
+def test_forwarded_for_identifies_client_behind_trusted_proxy():
+    client, _, _ = _client(client_rate=0.001, client_burst=1, trusted_proxies=['127.0.0.1'])
+
+    for addr in ('10.0.0.1', '10.0.0.2'):
+        result = client.simulate_post('/echo', headers={'X-Forwarded-For': addr}, remote_addr='127.0.0.1')
+        assert result.status_code == 200
+
+
+def test_batches_are_charged_per_item():
+    client, _, _ = _client(client_rate=0.001, client_burst=4)
+
+    assert client.simulate_post('/echo', params={'cost': 5}).status_code == 413
+    assert client.simulate_post('/echo', params={'cost': 3}).status_code == 200
+    assert client.simulate_post('/echo', params={'cost': 3}).status_code == 429
@@ -0,0 +1,58 @@
+from threading import Thread
+
+from py_interview.common.domain.event import Event, new_event
+from py_interview.common.helpers.base.base_data_layer_cache import BaseDataLayerCache
+from py_interview.common.helpers.base.base_data_layer_in_memory import BaseDataLayerInMemory
+
+
+def _cache_layer() -> BaseDataLayerCache:
+    return BaseDataLayerCache(target_class=Event, underlying=BaseDataLayerInMemory(target_class=Event),
+                              refresh_in_background=False,
+                              max_get_cache_bytes=1024 * 1024, max_list_cache_bytes=1024 * 1024)
+
+
+def test_writes_invalidate_list_cache():
+    layer = _cache_layer()
+    event = layer.create(new_event(number_of_likes=0))
+    assert layer.list()[0].number_of_likes == 0
+
+    layer.increment(uqid=event.uqid, deltas={'number_of_likes': 2})
+
+    assert layer.list()[0].number_of_likes == 2
+    assert layer.get(uqid=event.uqid).number_of_likes == 2
+
+
+def test_memory_usage_reports_bytes_within_budget():
+    layer = _cache_layer()
+    layer.create([new_event(name=str(i)) for i in range(100)])
+    layer.list()
+
+    usage = layer.memory_usage()
+
+    assert 0 < usage['list_cache_bytes'] <= usage['list_cache_budget_bytes']
+    assert usage['get_cache_entries'] == 100
+    assert usage['total_bytes'] == usage['get_cache_bytes'] + usage['list_cache_bytes']
+
+
+def test_delete_of_uncached_uqid():
+    layer = _cache_layer()
+
+    assert layer.delete(uqid='missing') is None
+
+
+def test_concurrent_increments_leave_get_cache_consistent():
+    layer = _cache_layer()
+    event = layer.create(new_event(number_of_likes=0))
+
+    def like():
+        for _ in range(200):
+            layer.increment(uqid=event.uqid, deltas={'number_of_likes': 1})
+            layer.get(uqid=event.uqid)
+
+    threads = [Thread(target=like) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert layer.get(uqid=event.uqid).number_of_likes == 8 * 200
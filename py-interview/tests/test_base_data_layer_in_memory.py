@@ -0,0 +1,88 @@
+from dataclasses import replace
+from threading import Thread
+
+import pytest
+
+from py_interview.common.domain.event import Event, new_event
+from py_interview.common.helpers.base.base_data_layer_in_memory import BaseDataLayerInMemory
+
+
+def test_crud():
+    layer = BaseDataLayerInMemory(target_class=Event)
+    events = layer.create([new_event(name=str(i)) for i in range(3)])
+
+    layer.update(uqid=events[0].uqid, attr={'name': 'renamed'})
+    layer.delete(uqid=events[1].uqid)
+
+    assert [e.name for e in layer.list()] == ['renamed', '2']
+    assert layer.get(uqid=events[1].uqid) is None
+
+
+def test_bulk_create_appends_in_order_and_overwrites_existing():
+    layer = BaseDataLayerInMemory(target_class=Event)
+    first = layer.create([new_event(name=str(i)) for i in range(1000)])
+    renamed = replace(first[0], name='renamed')
+
+    layer.create([renamed] + [new_event(name=str(i)) for i in range(1000, 2000)])
+
+    assert [e.name for e in layer.list()] == ['renamed'] + [str(i) for i in range(1, 2000)]
+
+
+def test_snapshot_is_isolated_from_later_writes():
+    layer = BaseDataLayerInMemory(target_class=Event)
+    event = layer.create(new_event(name='a'))
+    snapshot = layer.snapshot()
+
+    layer.update(uqid=event.uqid, attr={'name': 'b'})
+    layer.create(new_event(name='c'))
+
+    assert [e.name for e in snapshot.data.values()] == ['a']
+    assert layer.snapshot().version > snapshot.version
+
+
+def test_concurrent_increments_are_not_lost():
+    layer = BaseDataLayerInMemory(target_class=Event)
+    event = layer.create(new_event(number_of_likes=0))
+
+    def like():
+        for _ in range(300):
+            layer.increment(uqid=event.uqid, deltas={'number_of_likes': 1})
+
+    threads = [Thread(target=like) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert layer.get(uqid=event.uqid).number_of_likes == 2400
+
+
+def test_failed_write_is_rolled_back_and_raised():
+    layer = BaseDataLayerInMemory(target_class=Event)
+    event = layer.create(new_event(name='a'))
+
+    with pytest.raises(TypeError):
+        layer.update(uqid=event.uqid, attr={'not_a_field': 1})
+
+    assert layer.get(uqid=event.uqid).name == 'a'
+
+
+def test_increment_of_missing_uqid_returns_none():
+    layer = BaseDataLayerInMemory(target_class=Event)
+
+    assert layer.increment(uqid='missing', deltas={'number_of_likes': 1}) is None
+
+
+def test_increment_many_applies_deltas_in_one_version():
+    layer = BaseDataLayerInMemory(target_class=Event)
+    events = layer.create([new_event(number_of_likes=1), new_event(number_of_likes=5)])
+    version = layer.snapshot().version
+
+    res = layer.increment_many(deltas={events[0].uqid: {'number_of_likes': 2},
+                                       events[1].uqid: {'number_of_likes': 3},
+                                       'missing': {'number_of_likes': 1}})
+
+    assert res[events[0].uqid].number_of_likes == 3
+    assert res[events[1].uqid].number_of_likes == 8
+    assert res['missing'] is None
+    assert layer.snapshot().version == version + 1
@@ -0,0 +1,23 @@
+import pytest
+
+comment_domain = pytest.importorskip('py_interview.common.domain.comment')
+
+from py_interview.common.data_layer.comment_data_layer import CommentDataLayerInMemory  # noqa: E402
+
+
+def _comment(event_uqid: str, text: str):
+    return comment_domain.new_comment(event_uqid=event_uqid, user='unit-test-1', text=text)
+
+
+def test_pagination_follows_insertion_order_after_delete():
+    layer = CommentDataLayerInMemory()
+    comments = [_comment('event-1', str(i)) for i in range(5)]
+    for c in comments[:3]:
+        layer.add_comment(event_uqid='event-1', comment=c)
+    layer.add_comments(comments=comments[3:])
+
+    layer.delete(uqid=comments[1].uqid)
+    page, total = layer.get_comments_for_event(event_uqid='event-1', limit=2, offset=1)
+
+    assert total == 4
+    assert [c.text for c in page] == ['2', '3']
@@ -0,0 +1,70 @@
+from threading import Thread
+
+import pytest
+
+pytest.importorskip('py_interview.common.domain.comment')
+
+from py_interview.common.data_layer.comment_data_layer import CommentDataLayerInMemory  # noqa: E402
+from py_interview.common.data_layer.event_data_layer import EventDataLayerInMemory  # noqa: E402
+from py_interview.common.domain.event import new_event  # noqa: E402
+from py_interview.common.service.event_service import (  # noqa: E402
+    EventServiceDefault, MAX_LIKES_PER_BATCH, MAX_LIKES_PER_ITEM, like_count)
+
+
+def _service():
+    event_data_layer = EventDataLayerInMemory()
+    event = event_data_layer.create(new_event(number_of_likes=0))
+    return EventServiceDefault(event_data_layer=event_data_layer,
+                               comment_data_layer=CommentDataLayerInMemory()), event_data_layer, event
+
+
+def test_concurrent_like_batches_are_not_lost():
+    service, event_data_layer, event = _service()
+
+    def like():
+        for _ in range(100):
+            service.like_events(likes=[{'uqid': event.uqid, 'count': 1}])
+
+    threads = [Thread(target=like) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert event_data_layer.get(uqid=event.uqid).number_of_likes == 800
+
+
+def test_like_counts_are_capped():
+    service, event_data_layer, event = _service()
+    too_many = MAX_LIKES_PER_BATCH // MAX_LIKES_PER_ITEM + 1
+
+    results = service.like_events(likes=[{'uqid': event.uqid, 'count': 10 ** 12}] +
+                                        [{'uqid': event.uqid, 'count': MAX_LIKES_PER_ITEM}] * too_many)
+
+    assert not results[0].success and not results[-1].success
+    assert all(r.success for r in results[1:-1])
+    assert event_data_layer.get(uqid=event.uqid).number_of_likes == MAX_LIKES_PER_BATCH
+
+
+def test_non_string_fields_are_per_item_errors():
+    service, _, event = _service()
+
+    likes = service.like_events(likes=[{'uqid': ['a']}, {'uqid': {'a': 1}}])
+    comments = service.add_comments(comments=[{'uqid': event.uqid, 'user': {'a': 1}, 'text': 5},
+                                              {'uqid': event.uqid, 'user': 'u', 'text': 't'}])
+
+    assert [r.success for r in likes] == [False, False]
+    assert [r.success for r in comments] == [False, True]
+
+
+def test_like_of_unknown_uqid_is_reported():
+    service, event_data_layer, event = _service()
+
+    assert service.like_event(uqid=event.uqid) is True
+    assert service.like_event(uqid='missing') is False
+
+
+def test_like_count_validation():
+    assert like_count({}) == 1
+    assert like_count({'count': MAX_LIKES_PER_ITEM}) == MAX_LIKES_PER_ITEM
+    assert all(like_count({'count': c}) is None for c in (0, MAX_LIKES_PER_ITEM + 1, True, '3', 2.0))
@@ -0,0 +1,76 @@
+import random
+
+from py_interview.common.helpers.base.persistent import PersistentMap, PersistentTable, PersistentVector
+
+
+def test_vector_append_and_set_share_structure():
+    vector = PersistentVector()
+    for i in range(2000):
+        vector = vector.append(i)
+
+    updated = vector.set(1500, 'x')
+
+    assert list(vector) == list(range(2000))
+    assert updated[1500] == 'x' and vector[1500] == 1500
+    assert vector.slice(30, 35) == [30, 31, 32, 33, 34]
+
+
+def test_map_matches_dict():
+    rng = random.Random(7)
+    m, expected = PersistentMap(), {}
+    for i in range(5000):
+        key = rng.randrange(1000)
+        if rng.random() < 0.3:
+            m, _ = m.delete(key), expected.pop(key, None)
+        else:
+            m, expected[key] = m.set(key, i), i
+
+    assert len(m) == len(expected)
+    assert dict(m.items()) == expected
+
+
+def test_table_keeps_insertion_order_through_updates_and_deletes():
+    rng = random.Random(11)
+    table, expected = PersistentTable(), {}
+    for i in range(5000):
+        key = str(rng.randrange(500))
+        if rng.random() < 0.4:
+            table, _ = table.delete(key), expected.pop(key, None)
+        else:
+            table, expected[key] = table.set(key, i), i
+
+    assert list(table.items()) == list(expected.items())
+    assert table.slice_keys(3, 8) == list(expected)[3:8]
+
+
+def test_old_versions_are_unchanged():
+    before = PersistentTable().set('a', 1).set('b', 2)
+    after = before.set('a', 10).delete('b')
+
+    assert dict(before.items()) == {'a': 1, 'b': 2}
+    assert dict(after.items()) == {'a': 10}
+
+
+def test_bulk_updates_match_single_writes():
+    rng = random.Random(5)
+    table, expected = PersistentTable(), {}
+    for i in range(50):
+        batch = [(str(rng.randrange(3000)), i) for _ in range(rng.randrange(1, 400))]
+        table = table.update(batch)
+        expected.update(batch)
+        key = str(rng.randrange(3000))
+        table, _ = table.delete(key), expected.pop(key, None)
+
+    assert list(table.items()) == list(expected.items())
+    assert len(PersistentMap().update(expected.items())) == len(expected)
+
+
+def test_vector_extend_after_appends():
+    vector = PersistentVector()
+    for i in range(40):
+        vector = vector.append(i)
+
+    extended = vector.extend(range(40, 3000)).append(3000)
+
+    assert list(extended) == list(range(3001)) and extended[1100] == 1100
+    assert list(vector) == list(range(40))
@@ -0,0 +1,129 @@
+from dataclasses import dataclass
+
+import pytest
+
+from py_interview.common.helpers.base.tiny_lfu_cache import TinyLfuCache, estimate_size
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _cache(maxsize: int = 10_000, ttl: float = 60, timer=None) -> TinyLfuCache:
+    return TinyLfuCache(maxsize=maxsize, ttl=ttl, getsizeof=lambda v: v, timer=timer or FakeTimer())
+
+
+def test_byte_accounting():
+    cache = _cache()
+    cache['a'] = 100
+    cache['b'] = 250
+    assert cache.currsize == 350
+
+    cache['a'] = 40  # replacing re-charges the new size
+    assert cache.currsize == 290
+
+    del cache['b']
+    assert cache.currsize == 40 and len(cache) == 1
+
+    cache.clear()
+    assert cache.currsize == 0 and len(cache) == 0
+
+
+def test_stays_within_budget():
+    cache = _cache(maxsize=1_000)
+    for i in range(500):
+        cache.set(i, 7)
+        assert cache.currsize <= cache.maxsize
+
+
+def test_scan_does_not_evict_hot_set():
+    cache = _cache(maxsize=10_000)
+    hot = [('hot', i) for i in range(50)]
+    for _ in range(20):
+        for key in hot:
+            if cache.get(key) is None:
+                cache[key] = 100
+
+    for i in range(10_000):
+        if cache.get(('scan', i)) is None:
+            cache[('scan', i)] = 100
+
+    assert all(key in cache for key in hot)
+
+
+def test_ttl_expiry():
+    timer = FakeTimer()
+    cache = _cache(ttl=10, timer=timer)
+    cache['a'] = 1
+
+    timer.now = 9
+    assert cache.get('a') == 1
+
+    timer.now = 10
+    assert cache.get('a') is None
+    assert 'a' not in cache
+
+
+def test_expire_releases_bytes():
+    timer = FakeTimer()
+    cache = _cache(ttl=10, timer=timer)
+    cache['a'] = 100
+    timer.now = 11
+
+    cache.expire()
+
+    assert cache.currsize == 0
+
+
+def test_pop_of_key_never_admitted():
+    cache = _cache(maxsize=1_000)
+    cache['too-big'] = 5_000  # larger than the main segment, never stored
+
+    assert cache.pop('too-big', None) is None
+    assert cache.pop('never-set', None) is None
+    with pytest.raises(KeyError):
+        cache.pop('too-big')
+    assert cache.currsize == 0
+
+
+def test_estimate_size_samples_large_lists():
+    @dataclass(frozen=True)
+    class Row:
+        name: str
+
+    one = estimate_size([Row(name='x')])
+    many = estimate_size([Row(name='x')] * 100_000)
+
+    assert many > one * 10_000
+
+
+def test_estimate_size_measures_variable_fields_per_instance():
+    @dataclass(frozen=True)
+    class Row:
+        likes: int
+        description: str
+
+    small = estimate_size(Row(likes=1, description='x'))
+    large = estimate_size(Row(likes=1, description='x' * 100_000))
+
+    assert large - small >= 100_000 - 1
+
+
+def test_rejected_candidate_evicts_nothing():
+    cache = _cache(maxsize=1_000)  # 10-byte window, 990-byte main
+    for key in ('a', 'b', 'c'):
+        cache[key] = 300
+        cache['filler'] = 9  # pushes the key out of the window into main
+    for _ in range(3):
+        cache.get('c')
+    for _ in range(2):
+        cache.get('big')
+
+    cache['big'] = 900  # colder than 'c', which it would also have to evict
+
+    assert all(key in cache for key in ('a', 'b', 'c'))
+    assert 'big' not in cache